@@ -177,6 +177,11 @@ class HOG(AbstractGene):
             raise EvolutionaryConceptError('Cannot be a child of itself')
 
         self.children.append(child_to_add)
+
+        # keep the non singleton counter of the extant genome up to date
+        if child_to_add.parent is None and isinstance(child_to_add, Gene) and child_to_add.genome is not None:
+            child_to_add.genome._nonsingleton_count += 1
+
         child_to_add.parent = self
 
     def remove_child(self, child_to_remove):
@@ -197,6 +202,11 @@ class HOG(AbstractGene):
 
         if child_to_remove in self.children:
             self.children.remove(child_to_remove)
+
+            # keep the non singleton counter of the extant genome up to date
+            if isinstance(child_to_remove, Gene) and child_to_remove.genome is not None:
+                child_to_remove.genome._nonsingleton_count -= 1
+
             child_to_remove.parent = None
 
         else:
@@ -301,11 +311,16 @@ class HOG(AbstractGene):
 
         """
 
-        def append_leaf(current, child, list):
-            list.append(child)
-            return list
-
-        return self.visit([], function_extant_gene=append_leaf)
+        # iterative depth first traversal (same order as visit()) to avoid the recursive calls and callbacks.
+        genes = []
+        stack = self.children[::-1]
+        while stack:
+            child = stack.pop()
+            if isinstance(child, Gene):
+                genes.append(child)
+            else:
+                stack.extend(child.children[::-1])
+        return genes
 
     def get_all_descendant_genes_clustered_by_species(self):
         """ 
@@ -419,6 +434,9 @@ class Gene(AbstractGene):
         if self.genome is not None and genome != self.genome:
             raise EvolutionaryConceptError("Gene can only belong to one genome")
 
+        if self.genome is None and self.parent is not None:
+            genome._nonsingleton_count += 1
+
         self.genome = genome
 
     def get_dict_xref(self): #              <-- TODO: UT
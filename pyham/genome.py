@@ -19,7 +19,8 @@ class Genome(object):
     Attributes:
         | taxon (:obj:`ete3.TreeNode` of the :obj:`pyham.taxonomy`.tree): corresponding taxon.
         | name (:obj:`str`): Name of the Genome. Get from the newick tree if specified otherwise build it by concatenating all children genome names.
-        | genes (:obj:`list`): list of :obj:`pyham.abstractgene.AbstractGene` related to this Genome.
+        | genes (:obj:`list`): list of :obj:`pyham.abstractgene.AbstractGene` related to this Genome. Converted to a 
+        :obj:`tuple` by finalize(), no gene can be added afterwards.
 
     """
 
@@ -28,6 +29,12 @@ class Genome(object):
         self.taxon = None
         self.name = None
 
+        # index of genes with a unique id (i.e. extant genes) by their unique id.
+        self._gene_by_id = {}
+
+        # set by finalize(), genes is then a tuple.
+        self._finalized = False
+
     def add_gene(self, gene):
 
         """  
@@ -40,6 +47,7 @@ class Genome(object):
         
         Raises:
             TypeError: if gene is not an AbstractGene.
+            ValueError: if the genome is finalized.
         """
         from .abstractgene import AbstractGene
         if not isinstance(gene, AbstractGene):
@@ -47,9 +55,59 @@ class Genome(object):
                             .format(AbstractGene.__name__,
                                     type(gene).__name__))
 
+        self.add_gene_unchecked(gene)
+
+    def add_gene_unchecked(self, gene):
+
+        """  
+        Same as add_gene without the type checking of gene. Only used by trusted callers (e.g. the OrthoXMLParser) that
+        have just created the AbstractGene.
+
+        Attributes:
+            | gene (:obj:`AbstractGene`): AbstractGene to add.
+        """
+
+        if self._finalized:
+            raise ValueError("cannot add a gene to the finalized genome {}".format(self.name))
+
         self.genes.append(gene)
         gene.set_genome(self)
 
+        unique_id = getattr(gene, "unique_id", None)
+        if unique_id is not None:
+            self._gene_by_id[unique_id] = gene
+
+    def finalize(self):
+
+        """  
+        Convert the genes list into a tuple once all genes are added. Adding a gene afterwards raises a ValueError.
+        Calling it more than once has no effect.
+        """
+
+        if not self._finalized:
+            self.genes = tuple(self.genes)
+            self._finalized = True
+
+    def get_gene(self, gene_unique_id):
+
+        """  
+        Get the :obj:`pyham.abstractgene.Gene` of this Genome that match the query unique gene id.
+
+        Args:
+            gene_unique_id: Unique gene id.
+
+        Returns:
+            :obj:`pyham.abstractgene.Gene`
+
+        Raises:
+            KeyError: if no gene of this Genome match the id.
+        """
+
+        try:
+            return self._gene_by_id[gene_unique_id]
+        except KeyError:
+            raise KeyError('Id {} cannot match any Gene unique Id in genome {}.'.format(gene_unique_id, self.name))
+
     def set_taxon(self, taxon):
 
         """  
@@ -76,6 +134,11 @@ class Genome(object):
         """ Return the number of genes"""
         pass
 
+    @abc.abstractmethod
+    def _register_on_taxonomy(self, taxonomy, node):
+        """ Register the node in the related tracker of the :obj:`pyham.taxonomy.Taxonomy`."""
+        pass
+
     def __str__(self):
         return self.name
 
@@ -104,15 +167,19 @@ class AncestralGenome(Genome):
 
         """
 
-        if self.ancestral_clustering is None:
-            self.ancestral_clustering = {}
-            for hog in self.genes:
-                self.ancestral_clustering[hog] = hog.get_all_descendant_genes()
-        return self.ancestral_clustering
+        ancestral_clustering = self.ancestral_clustering
+        if ancestral_clustering is None:
+            ancestral_clustering = {hog: hog.get_all_descendant_genes() for hog in self.genes}
+            self.ancestral_clustering = ancestral_clustering
+        return ancestral_clustering
 
     def get_number_genes(self):
         return len(self.genes)
 
+    def _register_on_taxonomy(self, taxonomy, node):
+        self.name = node.name
+        taxonomy.internal_nodes.add(node)
+
 
 class ExtantGenome(Genome):
 
@@ -130,6 +197,9 @@ class ExtantGenome(Genome):
         self.name = name
         self.taxid = NCBITaxId
 
+        # number of genes with a parent HOG, updated by Gene.set_genome and HOG.add_child/remove_child.
+        self._nonsingleton_count = 0
+
     def get_number_genes(self, singleton=True): #  TODO: UT
 
         """ Get the number of this of this ExtantGenome.
@@ -145,11 +215,21 @@ class ExtantGenome(Genome):
         if singleton:
             return len(self.genes)
         else:
-            nbr = 0
-            for g in self.genes:
-                if not g.is_singleton():
-                    nbr += 1
-            return nbr
+            return self._nonsingleton_count
+
+    def has_nonsingleton(self):
+
+        """ Check if at least one gene of this ExtantGenome belongs to a HOG.
+
+            Returns:
+                :obj:`bool`.
+
+        """
+
+        return self._nonsingleton_count > 0
+
+    def _register_on_taxonomy(self, taxonomy, node):
+        taxonomy.leaves.add(node)
 
 
 class EvolutionaryConceptError(Exception):
@@ -132,7 +132,7 @@ class Ham(object):
 
     def __init__(self, tree_file=None, hog_file=None, type_hog_file="orthoxml", filter_object=None, use_internal_name=False,\
                  orthoXML_as_string=False, tree_format='newick_string', phyloxml_internal_name_tag='taxonomy_scientific_name', \
-                 phyloxml_leaf_name_tag='taxonomy_scientific_name', use_data_from=None, query_database=None):
+                 phyloxml_leaf_name_tag='taxonomy_scientific_name', use_data_from=None, query_database=None, fast_parse=False):
         """
 
         Args:
@@ -149,6 +149,7 @@ class Ham(object):
             | use_data_from (:obj:`str`) if specified,  use data from a remote databaseto populate pyHam. Defaults to None. Options: 'oma'.
             | query_database (:obj:`str`) if use_data_from is specified, use this as a query to fetch the orthoxml and \
             tree information for the related query hog (gene family). For 'oma', this correspond to the oma gene id (e.g. 'HUMAN12' or 'CHIMP1435').
+            | fast_parse (:obj:`Boolean`, optional): Parse newick trees with the balanced parentheses parser of the optional 'iow' package, faster than the ete3 parser on large trees. Defaults to False.
         """
 
         if use_data_from!=None:
@@ -236,7 +237,7 @@ class Ham(object):
         if phyloxml_leaf_name_tag not in accepted_tag_phyloxml or phyloxml_internal_name_tag not in accepted_tag_phyloxml:
             raise TypeError("{} is an invalid type phyloxml tag name")
 
-        self.taxonomy = tax.Taxonomy(self.tree_file, tree_format=tree_format, use_internal_name=use_internal_name, phyloxml_leaf_name_tag=phyloxml_leaf_name_tag, phyloxml_internal_name_tag=phyloxml_internal_name_tag)
+        self.taxonomy = tax.Taxonomy(self.tree_file, tree_format=tree_format, use_internal_name=use_internal_name, phyloxml_leaf_name_tag=phyloxml_leaf_name_tag, phyloxml_internal_name_tag=phyloxml_internal_name_tag, fast_parse=fast_parse)
         logger.info('Build taxonomy: completed.')
 
         # Misc. information
@@ -245,6 +246,9 @@ class Ham(object):
         self.external_id_mapper = None
         self.HOGMaps = {}
 
+        # set once the genomes are finalized, genomes created afterwards are finalized at creation.
+        self._genomes_finalized = False
+
         # Parsing of data
         if self.hog_file_type == "orthoxml":
 
@@ -283,6 +287,11 @@ class Ham(object):
         else:
             raise TypeError("Invalid type of hog file")
 
+        self.taxonomy.finalize()
+        for genome in self.get_list_extant_genomes() + self.get_list_ancestral_genomes():
+            genome.finalize()
+        self._genomes_finalized = True
+
         logger.info(
             'Set up Ham analysis: ready to go with {} hogs founded within {} species.'.format(
                 len(self.top_level_hogs), len(self.taxonomy.leaves)))
@@ -564,7 +573,7 @@ class Ham(object):
 
         """
 
-        return [leaf.genome for leaf in self.taxonomy.leaves]
+        return [leaf.genome for leaf in self.taxonomy.leaves_tuple]
 
     def get_extant_genome_by_name(self, name):
 
@@ -579,7 +588,7 @@ class Ham(object):
 
         """
 
-        for taxon in self.taxonomy.leaves:
+        for taxon in self.taxonomy.leaves_tuple:
             if taxon.name == name:
                 if "genome" in taxon.features:
                     return taxon.genome
@@ -597,7 +606,7 @@ class Ham(object):
                 a list of :obj:`pyham.genome.AncestralGenome`.
 
         """
-        return [internal_node.genome for internal_node in self.taxonomy.internal_nodes]
+        return [internal_node.genome for internal_node in self.taxonomy.internal_nodes_tuple]
 
     def get_ancestral_genome_by_taxon(self, taxon):
 
@@ -630,7 +639,7 @@ class Ham(object):
 
         """
 
-        for taxon in self.taxonomy.internal_nodes:
+        for taxon in self.taxonomy.internal_nodes_tuple:
             if taxon.name == name:
                 if "genome" in taxon.features:
                     return taxon.genome
@@ -661,7 +670,7 @@ class Ham(object):
 
         genome_nodes = set([geno.taxon for geno in genome_set])
 
-        mrca_node = self.taxonomy.tree.get_common_ancestor(genome_nodes)
+        mrca_node = self.taxonomy.get_mrca(genome_nodes)
 
         return self.get_ancestral_genome_by_taxon(mrca_node)
 
@@ -758,11 +767,9 @@ class Ham(object):
 
         """
 
-        mrca = self.taxonomy.tree.get_common_ancestor({g1.taxon,g2.taxon})
-
-        if g1.taxon == mrca:
+        if self.taxonomy.is_ancestor_of(g1.taxon, g2.taxon):
             return g1, g2
-        elif g2.taxon == mrca:
+        elif self.taxonomy.is_ancestor_of(g2.taxon, g1.taxon):
             return g2, g1
         else:
             raise TypeError("The genomes are not in the same lineage: {}".format({g1, g2}))
@@ -830,6 +837,23 @@ class Ham(object):
 
         return factory.toplevel_hogs, factory.extant_gene_map, factory.external_id_mapper
 
+    def _add_genome_to_node(self, node, genome):
+
+        """  
+        Attach a newly created :obj:`Genome` to its taxonomy node. If the Ham genomes are already finalized (i.e. the
+        genome is created after the parsing), the genome is finalized too.
+
+            Args:
+                | node : treeNode object of the :obj:`Taxonomy`.tree object.
+                | genome (:obj:`Genome`): :obj:`Genome` to attach.
+
+        """
+
+        self.taxonomy.add_genome_to_node(node, genome)
+
+        if self._genomes_finalized:
+            genome.finalize()
+
     def _get_ancestral_genome_by_name(self, name):
 
         """  
@@ -854,7 +878,7 @@ class Ham(object):
 
             else:
                 ancestral_genome = AncestralGenome()
-                self.taxonomy.add_genome_to_node(node, ancestral_genome)
+                self._add_genome_to_node(node, ancestral_genome)
 
                 return ancestral_genome
         else:
@@ -884,7 +908,7 @@ class Ham(object):
 
             else:
                 extant_genome = ExtantGenome(**kwargs)
-                self.taxonomy.add_genome_to_node(node, extant_genome)
+                self._add_genome_to_node(node, extant_genome)
                 return extant_genome
         else:
             raise KeyError('{} node(s) founded for the species name: {}'.format(len(nodes_founded), kwargs['name']))
@@ -908,7 +932,7 @@ class Ham(object):
 
         else:
             ancestral_genome = AncestralGenome()
-            self.taxonomy.add_genome_to_node(tax_node, ancestral_genome)
+            self._add_genome_to_node(tax_node, ancestral_genome)
 
             return ancestral_genome
 
@@ -953,6 +977,6 @@ class Ham(object):
 
         genome_nodes = set([gen.taxon for gen in genome_set])
 
-        mrca_node = self.taxonomy.tree.get_common_ancestor(genome_nodes)
+        mrca_node = self.taxonomy.get_mrca(genome_nodes)
 
         return self._get_ancestral_genome_by_taxon(mrca_node)
\ No newline at end of file
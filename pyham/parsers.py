@@ -70,7 +70,7 @@ class OrthoXMLParser(object):
     def _build_gene(self, attrib):
         gene = abstractgene.Gene(**attrib)
         gene.set_genome(self.current_species)
-        self.current_species.add_gene(gene)
+        self.current_species.add_gene_unchecked(gene)
         self.extant_gene_map[gene.unique_id] = gene
         for type, Id in attrib.items():
             if type is not "id":
@@ -180,7 +180,7 @@ class OrthoXMLParser(object):
                     ancestral_genome = self.ham_object._get_ancestral_genome_by_mrca_of_hog_children_genomes(hog)
 
                 hog.set_genome(ancestral_genome)
-                ancestral_genome.taxon.genome.add_gene(hog)
+                ancestral_genome.taxon.genome.add_gene_unchecked(hog)
 
                 # get all child clustered by dup if any
                 child_by_duplication = defaultdict(list)
@@ -197,7 +197,7 @@ class OrthoXMLParser(object):
                         # create the MRCA hog
                         mrcahog = abstractgene.HOG()
                         mrcahog.set_genome(duplication.MRCA)
-                        duplication.MRCA.add_gene(mrcahog)
+                        duplication.MRCA.add_gene_unchecked(mrcahog)
 
                         hog.add_child(mrcahog)
 
@@ -7,14 +7,57 @@ from future import standard_library
 standard_library.install_aliases()
 import ete3
 import logging
-from .genome import ExtantGenome, AncestralGenome, Genome
+from .genome import Genome
 from six import BytesIO
 from ete3 import Phyloxml
 import re
+from collections import deque
 
 
 logger = logging.getLogger(__name__)
 
+# Ad-hoc changes applied in a single pass to the exported phyloxml document to meet the schema definition: the
+# root tag is replaced by the phyloxml header, branch_length_attr, 'phy:' namespaces, new lines and quotes are removed
+# and 'Phyloxml' is lower cased.
+_PHYLOXML_HEADER = '<phyloxml xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns="http://www.phyloxml.org" ' \
+                   'xsi:schemaLocation="http://www.phyloxml.org http://www.phyloxml.org/1.20/phyloxml.xsd">'
+_PHYLOXML_REPLACEMENTS = {'phy:': '', 'Phyloxml': 'phyloxml', '\n': '', "'": ''}
+_RE_PHYLOXML_CLEANUP = re.compile(r'<(?:phy:)?Phyloxml[^>]+>|branch_length_attr="[^"]+"|phy:|Phyloxml|\n|\'')
+
+
+def _phyloxml_cleanup(match):
+    token = match.group(0)
+    if token.startswith('<'):
+        return _PHYLOXML_HEADER
+    elif token.startswith('branch_length_attr'):
+        return ''
+    return _PHYLOXML_REPLACEMENTS[token]
+
+
+def _by_tid(node):
+    return node.tid
+
+
+def _postorder(root):
+    """  
+    Iterative postorder traversal of a Etree (two stacks), return a deque of nodes with children before parents.
+    """
+    nodes, stack = deque(), [root]
+    while stack:
+        node = stack.pop()
+        nodes.appendleft(node)
+        stack.extend(node.children)
+    return nodes
+
+
+def _set_name_from_children(node):
+    """  
+    Name an internal node by concatenation of its children names, equivalent to Taxonomy.set_taxon_name once the
+    children are named (i.e. nodes named in postorder) but linear in the number of children. Leaves are unchanged.
+    """
+    if node.children:
+        node.name = "/".join(str(child.name) for child in node.children)
+
 
 class Taxonomy(object):
     """
@@ -25,9 +68,12 @@ class Taxonomy(object):
         | tree (:obj:`ete3 Etree`): species ete3 Etree tree.
         | internal_nodes (:obj:`set`): Set of Etree node that contained a AncestralGenome.
         | leaves (:obj:`set`): Set of Etree node that contained a ExtantGenome.
+        | nodes_by_tid (:obj:`list`): List of Etree node indexed by their preorder traversal id (tid).
+        | internal_nodes_tuple (:obj:`tuple`): internal_nodes sorted by tid, rebuilt on read after a genome is added.
+        | leaves_tuple (:obj:`tuple`): leaves sorted by tid, rebuilt on read after a genome is added.
 
     """
-    def __init__(self, tree_file, tree_format='newick_string', use_internal_name=False, phyloxml_leaf_name_tag=None, phyloxml_internal_name_tag=None, quoted_node_names=True):
+    def __init__(self, tree_file, tree_format='newick_string', use_internal_name=False, phyloxml_leaf_name_tag=None, phyloxml_internal_name_tag=None, quoted_node_names=True, fast_parse=False):
         """
         Args:
             | tree_file (:obj:`str`): Path to the file that contained the taxonomy information.
@@ -35,6 +81,9 @@ class Taxonomy(object):
             | use_internal_name (:obj:`Boolean`, optional): Specify wheter using the given internal node name or use the 
             | concatenatation of the children name. Defaults to False.
             | quoted_node_names (:obj:'Boolean', optional): Specify whether newick file has quoted node names.
+            | fast_parse (:obj:'Boolean', optional): Parse newick trees with the balanced parentheses parser of the 
+            | optional 'iow' package, faster than the ete3 parser on large trees. Branch lengths missing from the
+            | newick are 0.0 instead of the ete3 default of 1.0. Defaults to False.
         """
 
         self.tree_file = tree_file
@@ -44,7 +93,7 @@ class Taxonomy(object):
         self.phyloxml_internal_name_tag = phyloxml_internal_name_tag
 
         # create tree
-        self.tree = self._build_tree(tree_file, tree_format, quoted_node_names)
+        self.tree = self._build_tree(tree_file, tree_format, quoted_node_names, fast_parse)
 
         # create internal node name if required
         self._generate_internal_node_name(self.tree)
@@ -59,6 +108,31 @@ class Taxonomy(object):
         self.internal_nodes = set()
         self.leaves = set()
 
+        # ordered snapshot of the trackers for iteration (reset when a genome is added), built by finalize().
+        self._internal_nodes_tuple = None
+        self._leaves_tuple = None
+
+    @property
+    def internal_nodes_tuple(self):
+        if self._internal_nodes_tuple is None:
+            self._internal_nodes_tuple = tuple(sorted(self.internal_nodes, key=_by_tid))
+        return self._internal_nodes_tuple
+
+    @property
+    def leaves_tuple(self):
+        if self._leaves_tuple is None:
+            self._leaves_tuple = tuple(sorted(self.leaves, key=_by_tid))
+        return self._leaves_tuple
+
+    def finalize(self):
+        """  build the tuple snapshots of the Genome trackers (internal_nodes_tuple and leaves_tuple) sorted by
+        preorder traversal id. Should be called once all genomes are attached to the taxonomy, the snapshots are then
+        rebuilt on the next read if a genome is added afterwards.
+        """
+
+        self._internal_nodes_tuple = tuple(sorted(self.internal_nodes, key=_by_tid))
+        self._leaves_tuple = tuple(sorted(self.leaves, key=_by_tid))
+
     def add_genome_to_node(self, node, genome):
         """  add the given genome to the node attribute "genome".
 
@@ -68,18 +142,16 @@ class Taxonomy(object):
 
         """
 
+        if not isinstance(genome, Genome):
+            raise TypeError("expect class obj of '{}', got {}".format(Genome.__name__, type(genome).__name__))
+
         node.add_feature("genome", genome)
         genome.set_taxon(node)
+        genome._register_on_taxonomy(self, node)
 
-        if isinstance(genome, ExtantGenome):
-            self.leaves.add(node)
-
-        elif isinstance(genome, AncestralGenome):
-            genome.name = node.name
-
-            self.internal_nodes.add(node)
-        else:
-            raise TypeError("expect class obj of '{}', got {}".format(type(Genome).__name__,type(genome).__name__))
+        # the ordered snapshots are rebuilt on next read.
+        self._internal_nodes_tuple = None
+        self._leaves_tuple = None
 
     def get_path_up(self, lowest_node, ancestor_node):
         """  return the internal node in between two nodes sorted by recentness.
@@ -93,14 +165,54 @@ class Taxonomy(object):
 
         """
 
-        intermediate_level = []
+        traversal_ids = lowest_node.traversal_ids
+        ancestor_depth = ancestor_node.depth
+
+        # ancestor_node is not on the lineage of lowest_node: keep all ancestors up to the root.
+        if ancestor_depth >= len(traversal_ids) - 1 or traversal_ids[ancestor_depth] != ancestor_node.tid:
+            ancestor_depth = -1
+
+        return [self.nodes_by_tid[tid] for tid in reversed(traversal_ids[ancestor_depth + 1:-1])]
+
+    def is_ancestor_of(self, ancestor_node, node):
+        """  return True if ancestor_node is on the lineage of node (a node is considered on its own lineage).
+
+            Args:
+                | ancestor_node (:obj:`node`): Putative ancestor node.
+                | node (:obj:`node`): Query node.
+
+            Returns:
+                :obj:`bool`
+
+        """
+
+        return node.traversal_ids[:len(ancestor_node.traversal_ids)] == ancestor_node.traversal_ids
+
+    def get_mrca(self, nodes):
+        """  return the most recent common ancestor of the given nodes, the last tid of the common prefix of their
+        traversal ids.
+
+            Args:
+                nodes (iterable of :obj:`node`): Query nodes.
+
+            Returns:
+                :obj:`node`
+
+        """
+
+        nodes = iter(nodes)
+        common_ids = next(nodes).traversal_ids
 
-        for tax in lowest_node.iter_ancestors():
-            if tax == ancestor_node:
-                break
-            intermediate_level.append(tax)
+        for node in nodes:
+            traversal_ids = node.traversal_ids
+            common_length = min(len(common_ids), len(traversal_ids))
+            for i in range(common_length):
+                if common_ids[i] != traversal_ids[i]:
+                    common_length = i
+                    break
+            common_ids = common_ids[:common_length]
 
-        return intermediate_level
+        return self.nodes_by_tid[common_ids[-1]]
 
     def get_newick_from_tree(self, node):
         """  return the newick tree string (format 8: all names) rooted at the given node.
@@ -121,134 +233,150 @@ class Taxonomy(object):
                  node (:obj:`node`): root node.
         """
 
-        level_name = ""
-        for leaf in node:
-            level_name += str(leaf.name)
-            level_name += "/"
+        node.name = "/".join(str(leaf.name) for leaf in node)
 
-        node.name = str(level_name[:-1])
+    @property
+    def tree_str(self):
+        # the phyloxml document is exported lazily on first access.
+        if self._tree_str is None and self.tree_format == 'phyloxml':
+            self._tree_str = self._export_phyloxml(self.tree)
+        return self._tree_str
+
+    @tree_str.setter
+    def tree_str(self, value):
+        self._tree_str = value
 
     def _generate_internal_node_name(self, tree):
-        if self.use_internal_name is False:
-            for node in tree.traverse("postorder"):
-                if node.is_leaf() is False:
-                    self.set_taxon_name(node)
 
+        # phyloxml internal nodes are named in _build_tree.
         if self.tree_format == 'phyloxml':
+            return
 
+        # postorder: children are named before their parent.
+        if self.use_internal_name is False:
+            for node in _postorder(tree):
+                _set_name_from_children(node)
 
-            #### IMPORTANT ####
-
-            '''
-            This code section is an horrible fix due to incompatibility of Phyloxml().export() with python3.
-            
-            We overwrite the export module (and its functions) here to deal with both byte and unicode.
-            
-            TODO: this should be replace as ASAP
-            '''
-
-            def showIndent(outfile, level):
-                for idx in range(level):
-                    g = '    '
-                    g = g.encode('UTF-8')
-                    outfile.write(g)
-            namespace_ = 'phy:'
-            name_ = 'Phyloxml'
-            namespacedef_ = ''
-            outfile = BytesIO()
-            level = 0
-            def export(xxxx, outfile, level, namespace_='phy:', name_='Phyloxml', namespacedef_=''):
-                showIndent(outfile, level)
-                x = '<%s%s%s' % (namespace_, name_, namespacedef_ and ' ' + namespacedef_ or '',)
-                x = x.encode('UTF-8')
-                outfile.write(x)
-                already_processed = []
-                exportAttributes(xxxx, outfile, level, already_processed, namespace_, name_='Phyloxml')
-                if hasContent_(xxxx):
-                    y = '>\n'
-                    y = y.encode('UTF-8')
-                    outfile.write(y)
-                    exportChildren(xxxx, outfile, level + 1, namespace_, name_)
-                    showIndent(outfile, level)
-                    z = '</%s%s>\n' % (namespace_, name_)
-                    z = z.encode('UTF-8')
-                    outfile.write(z)
-                else:
-                    v = '/>\n'
-                    v = v.encode('UTF-8')
-                    outfile.write(v)
-            def exportAttributes(xxxx, outfile, level, already_processed, namespace_='phy:', name_='Phyloxml'):
-                pass
-            def exportChildren(xxxx, outfile, level, namespace_='phy:', name_='Phyloxml', fromsubclass_=False):
-                for phylogeny_ in xxxx.phylogeny:
-                    export(phylogeny_, outfile, level, namespace_, name_='phylogeny')
-            def hasContent_(xxxx):
-                if hasattr(xxxx, 'phylogeny'):
-                    return True
-                else:
-                    return False
+        self.tree_str = self.tree.write(format=8, format_root_node=True)
 
-            #### IMPORTANT ####
+    def _export_phyloxml(self, tree):
+        """  
+        Export the Etree as a phyloxml document string.
+        """
 
-            # build phyloxml project
-            project = Phyloxml()
-            project.add_phylogeny(tree)
+        #### IMPORTANT ####
+
+        '''
+        This code section is an horrible fix due to incompatibility of Phyloxml().export() with python3.
+        
+        We overwrite the export module (and its functions) here to deal with both byte and unicode.
+        
+        TODO: this should be replace as ASAP
+        '''
+
+        def showIndent(outfile, level):
+            for idx in range(level):
+                g = '    '
+                g = g.encode('UTF-8')
+                outfile.write(g)
+        namespace_ = 'phy:'
+        name_ = 'Phyloxml'
+        namespacedef_ = ''
+        outfile = BytesIO()
+        level = 0
+        def export(xxxx, outfile, level, namespace_='phy:', name_='Phyloxml', namespacedef_=''):
+            showIndent(outfile, level)
+            x = '<%s%s%s' % (namespace_, name_, namespacedef_ and ' ' + namespacedef_ or '',)
+            x = x.encode('UTF-8')
+            outfile.write(x)
+            already_processed = []
+            exportAttributes(xxxx, outfile, level, already_processed, namespace_, name_='Phyloxml')
+            if hasContent_(xxxx):
+                y = '>\n'
+                y = y.encode('UTF-8')
+                outfile.write(y)
+                exportChildren(xxxx, outfile, level + 1, namespace_, name_)
+                showIndent(outfile, level)
+                z = '</%s%s>\n' % (namespace_, name_)
+                z = z.encode('UTF-8')
+                outfile.write(z)
+            else:
+                v = '/>\n'
+                v = v.encode('UTF-8')
+                outfile.write(v)
+        def exportAttributes(xxxx, outfile, level, already_processed, namespace_='phy:', name_='Phyloxml'):
+            pass
+        def exportChildren(xxxx, outfile, level, namespace_='phy:', name_='Phyloxml', fromsubclass_=False):
+            for phylogeny_ in xxxx.phylogeny:
+                export(phylogeny_, outfile, level, namespace_, name_='phylogeny')
+        def hasContent_(xxxx):
+            if hasattr(xxxx, 'phylogeny'):
+                return True
+            else:
+                return False
 
-            # Export phyloxml document
-            export(project, outfile, level, namespace_='phy:', name_='Phyloxml', namespacedef_='')
-            OUTPUT= outfile
+        #### IMPORTANT ####
 
+        # build phyloxml project
+        project = Phyloxml()
+        project.add_phylogeny(tree)
 
-            # Some ad-hoc changes to the phyloxml formatted document to meet the schema definition
-            text = OUTPUT.read().decode('UTF-8')
-            text = text.replace('phy:', '')
-            text = re.sub('branch_length_attr="[^"]+"', "", text)
-            header = """
-            <phyloxml xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns="http://www.phyloxml.org"          xsi:schemaLocation="http://www.phyloxml.org http://www.phyloxml.org/1.20/phyloxml.xsd">  
-            """
-            text = re.sub('<Phyloxml[^>]+>', header, text)
-            text = text.replace('Phyloxml', 'phyloxml')
-            text = text.replace('\n', '').replace("'", '')
+        # Export phyloxml document
+        export(project, outfile, level, namespace_='phy:', name_='Phyloxml', namespacedef_='')
+        OUTPUT= outfile
 
-            self.tree_str = text
-        else:
-            self.tree_str = self.tree.write(format=8, format_root_node=True)
+
+        # Some ad-hoc changes to the phyloxml formatted document to meet the schema definition
+        text = OUTPUT.read().decode('UTF-8')
+        return _RE_PHYLOXML_CLEANUP.sub(_phyloxml_cleanup, text)
 
     def _get_name_phyloxml(self, node, phyloxml_species_name_tag):
 
+        # the resolved name is cached on the node with the tag used to resolve it.
+        cached = getattr(node, "_resolved_name", None)
+        if cached is not None and cached[0] == phyloxml_species_name_tag:
+            return cached[1]
+
         if phyloxml_species_name_tag == 'clade_name':
-                if node.name != '':
-                    return node.name
-                else:
-                    raise KeyError(
-                        "Node {} in the phyloxml file {} have no clade name or phylogeny scientific name to populate the species name".format(
-                            node, self.tree_file))
+            name = node.name
+            if name == '':
+                raise KeyError(
+                    "Node {} in the phyloxml file {} have no clade name or phylogeny scientific name to populate the species name".format(
+                        node, self.tree_file))
 
         elif phyloxml_species_name_tag == 'taxonomy_scientific_name':
-            if node.phyloxml_clade.taxonomy[0].scientific_name != '':
-                return node.phyloxml_clade.taxonomy[0].scientific_name
-            else:
+            name = node.phyloxml_clade.taxonomy[0].scientific_name
+            if name == '':
                 raise KeyError(
                     "Node {} in the phyloxml file {} have no taxonomy scientific name  to populate the species name".format(
                         node, self.tree_file))
 
         elif phyloxml_species_name_tag == 'taxonomy_code':
-            if node.phyloxml_clade.taxonomy[0].code != '':
-                return node.phyloxml_clade.taxonomy[0].code
-            else:
+            name = node.phyloxml_clade.taxonomy[0].code
+            if name == '':
                 raise KeyError(
                     "Node {} in the phyloxml file {} have no taxonomy scientific code  to populate the species name".format(
                         node, self.tree_file))
 
-    def _build_tree(self, tree_file, tree_format, quoted_node_names):
+        else:
+            return None
+
+        node._resolved_name = (phyloxml_species_name_tag, name)
+        return name
+
+    def _build_tree(self, tree_file, tree_format, quoted_node_names=True, fast_parse=False):
 
         if tree_format == 'newick_string':
             self.tree_str = tree_file
+            if fast_parse:
+                return self._build_tree_from_bp(self.tree_str, quoted_node_names)
             return ete3.Tree(self.tree_str, format=1, quoted_node_names=quoted_node_names)
 
         elif tree_format == 'newick':
             with open(tree_file, 'r') as nwk_file:
                 self.tree_str = nwk_file.read()
+            if fast_parse:
+                return self._build_tree_from_bp(self.tree_str, quoted_node_names)
             return ete3.Tree(self.tree_str, format=1, quoted_node_names=quoted_node_names)
 
         elif tree_format == 'phyloxml':
@@ -259,7 +387,8 @@ class Taxonomy(object):
 
             tree = project.get_phylogeny()[0]
 
-            for node in tree.traverse():
+            # postorder traversal: children are named before their parent.
+            for node in _postorder(tree):
 
                 # assign name to extant species
                 if node.is_leaf():
@@ -269,17 +398,58 @@ class Taxonomy(object):
                 elif self.use_internal_name:
                     node.name = self._get_name_phyloxml(node, self.phyloxml_internal_name_tag)
 
+                # otherwise concatenate the children names
+                else:
+                    _set_name_from_children(node)
+
             return tree
 
+    def _build_tree_from_bp(self, newick, quoted_node_names=True):
+        """  
+        Parse the newick string with the balanced parentheses parser of the iow package (bp) and build the 
+        equivalent ete3 Etree, used for large trees where the ete3 newick parser is slow. As with ete3, quoted node
+        names are unquoted if quoted_node_names is True. Unlike ete3, missing branch lengths are 0.0 (bp does not
+        distinguish them from an explicit 0.0) instead of 1.0.
+        """
+
+        try:
+            import bp
+        except ImportError:
+            raise ImportError("fast_parse requires the 'iow' package (balanced parentheses tree parser). "
+                              "Install it or set fast_parse=False.")
+
+        bp_tree = bp.parse_newick(newick)
+
+        # nodes are created following the preorder, so the parent of each node is already created.
+        nodes = {}
+        root = None
+        for k in range(len(bp_tree.B) // 2):
+            idx = bp_tree.preorderselect(k)
+            name = bp_tree.name(idx)
+            if name is None:
+                name = ''
+            elif quoted_node_names and len(name) > 1 and name[0] == name[-1] == "'":
+                name = name[1:-1]
+            node = ete3.Tree(name=name, dist=bp_tree.length(idx))
+            nodes[idx] = node
+
+            if root is None:
+                root = node
+            else:
+                nodes[bp_tree.parent(idx)].add_child(node)
+
+        return root
+
     def _check_consistency_names(self):
 
         """  
-        Check if leaves names and internal node names are uniques.
+        Check if leaves names and internal node names are uniques. Generated internal names (use_internal_name=False)
+        are not checked: a unary internal node has the same name as its only child.
         
         """
 
-        leaf_names = []
-        int_names = []
+        leaf_names = set()
+        int_names = set()
 
         for node in self.tree.traverse():
 
@@ -289,30 +459,45 @@ class Taxonomy(object):
             if node.is_leaf():
                 if self.tree_format == 'phyloxml':
                     nn = self._get_name_phyloxml(node, self.phyloxml_leaf_name_tag)
-                    if nn != None:
-                        leaf_names.append(nn)
                 else:
-                    leaf_names.append(node.name)
-            else:
+                    nn = node.name
+
+                if nn in leaf_names:
+                    raise KeyError("Leaves names are not unique ! Leaf name {} founded twice.".format(nn))
+                if nn != None:
+                    leaf_names.add(nn)
+            elif self.use_internal_name:
                 if self.tree_format == 'phyloxml':
-                    nn = self._get_name_phyloxml(node,  self.phyloxml_internal_name_tag)
-                    if nn != None:
-                        int_names.append(nn)
+                    nn = self._get_name_phyloxml(node, self.phyloxml_internal_name_tag)
                 else:
-                    int_names.append(node.name)
+                    nn = node.name
 
-        # check for leaves name
-        if len(leaf_names) != len(set(leaf_names)):
-            raise KeyError("Leaves names are not unique ! Leaves founded: {}".format(int_names))
+                # unnamed internal nodes are allowed and not checked for unicity.
+                if not nn:
+                    continue
 
-        # Check for internal names
-        if len(set(int_names)) != len(set(int_names)):
-            raise KeyError("Internal Names are not unique. Internal names founded: {}. If you specify use_internal_name=False, please report the bug to us.".format(int_names))
+                if nn in int_names:
+                    raise KeyError("Internal Names are not unique. Internal name {} founded twice.".format(nn))
+                int_names.add(nn)
 
     def _add_depth(self, node, depth=0):
         """  
-        Recursive function to add depth to each node of a Etree.
+        Add depth, a preorder traversal id (tid) and the traversal ids (tuple of tids from root to node) to each node
+        of a Etree. The traversal is iterative (explicit stack) to avoid hitting the recursion limit on deep trees.
         """
+        self.nodes_by_tid = []
+
         node.add_feature("depth", depth)
-        for n in node.get_children():
-            self._add_depth(n, depth + 1)
\ No newline at end of file
+        node.add_feature("traversal_ids", ())
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            current.add_feature("tid", len(self.nodes_by_tid))
+            current.add_feature("traversal_ids", current.traversal_ids + (current.tid,))
+            self.nodes_by_tid.append(current)
+
+            child_depth = current.depth + 1
+            for child in reversed(current.children):
+                child.add_feature("depth", child_depth)
+                child.add_feature("traversal_ids", current.traversal_ids)
+                stack.append(child)
@@ -5,7 +5,7 @@ from io import open
 
 
 name = 'pyham'
-requirements = ['ete3', 'six', 'lxml', 'future','coreapi']
+requirements = ['ete3', 'six', 'lxml', 'future', 'coreapi', 'numpy']
 if sys.version_info > (3, 3):
     # ete3 uses some py3 incompatible types if scipy is not present 
     requirements.extend(['scipy'])  
@@ -55,7 +55,8 @@ setup(
     packages=find_packages(exclude=[]),
     install_requires=requirements,
     extras_require={
-        'test': ['noise'],
+        'test': ['noise', 'iow'],
+        'fast': ['iow'],
         'dev': ['noise', 'sphinx', 'wheel', 'twine', 'fabric', 'fabric3'],
     }
 )
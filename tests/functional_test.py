@@ -12,22 +12,11 @@ def _str_array(array):
 
 
 def _str_dict_one_value(dict):
-    for kk in dict.keys():
-        dict[str(kk)] = dict.pop(kk)
-    for k, v in dict.items():
-        dict[k] = str(v)
-    return dict
+    return {str(k): str(v) for k, v in dict.items()}
 
 
 def _str_dict_array_value(dict):
-    for kk in dict.keys():
-        dict[str(kk)] = dict.pop(kk)
-    for k, vs in dict.items():
-        array = []
-        for v in vs:
-            array.append(str(v))
-        dict[k] = set(array)
-    return dict
+    return {str(k): {str(v) for v in vs} for k, vs in dict.items()}
 
 
 class HamAnalysis(unittest.TestCase):
@@ -104,6 +104,20 @@ class HogTest(unittest.TestCase):
         with self.assertRaises(KeyError):
             a.score('testscore')
 
+    def test_get_all_descendant_genes(self):
+        a, b, c = HOG(id="a"), HOG(id="b"), HOG(id="c")
+        g1, g2, g3, g4 = Gene("1"), Gene("2"), Gene("3"), Gene("4")
+        a.add_child(g1)
+        a.add_child(b)
+        a.add_child(g4)
+        b.add_child(c)
+        b.add_child(g3)
+        c.add_child(g2)
+
+        self.assertListEqual([g1, g2, g3, g4], a.get_all_descendant_genes())
+        self.assertListEqual([g2, g3], b.get_all_descendant_genes())
+        self.assertListEqual([], HOG().get_all_descendant_genes())
+
 
 class AbstractGeneTest(unittest.TestCase):
 
@@ -9,6 +9,32 @@ import ete3
 
 class ExtantGenomeTest(unittest.TestCase):
 
+    def test_get_number_genes(self):
+        a = g.ExtantGenome(name="HUMAN", NCBITaxId="9601")
+        b1, b2, b3 = Gene(id="1"), Gene(id="2"), Gene(id="3")
+        h = HOG()
+
+        for b in [b1, b2, b3]:
+            a.add_gene(b)
+        self.assertFalse(a.has_nonsingleton())
+
+        h.add_child(b1)
+        h.add_child(b2)
+        self.assertEqual(3, a.get_number_genes())
+        self.assertEqual(2, a.get_number_genes(singleton=False))
+        self.assertTrue(a.has_nonsingleton())
+
+        h.remove_child(b1)
+        self.assertEqual(3, a.get_number_genes())
+        self.assertEqual(1, a.get_number_genes(singleton=False))
+
+        # gene with a parent before being added to the genome
+        b4 = Gene(id="4")
+        h.add_child(b4)
+        a.add_gene(b4)
+        self.assertEqual(4, a.get_number_genes())
+        self.assertEqual(2, a.get_number_genes(singleton=False))
+
     def test_name_and_NCBITaxId_required(self):
 
         # missing input should raises error
@@ -29,6 +55,37 @@ class ExtantGenomeTest(unittest.TestCase):
 
 class GenomeTest(unittest.TestCase):
 
+    def test_add_gene(self):
+        a1 = g.ExtantGenome(name="HUMAN", NCBITaxId="9601")
+        a2 = g.AncestralGenome()
+
+        # wrong type of input
+        with self.assertRaises(TypeError):
+            a1.add_gene("423")
+        with self.assertRaises(TypeError):
+            a2.add_gene(a1)
+
+        # valid
+        b = Gene(id="423")
+        a1.add_gene(b)
+        self.assertListEqual([b], a1.genes)
+        self.assertIs(a1, b.genome)
+        self.assertIs(b, a1.get_gene("423"))
+        with self.assertRaises(KeyError):
+            a1.get_gene("424")
+
+        h = HOG()
+        a2.add_gene_unchecked(h)
+        self.assertListEqual([h], a2.genes)
+        self.assertIs(a2, h.genome)
+
+        # genes are stored as tuple once finalized and cannot be added afterwards
+        a1.finalize()
+        a1.finalize()
+        self.assertTupleEqual((b,), a1.genes)
+        with self.assertRaises(ValueError):
+            a1.add_gene(Gene(id="424"))
+
     def test_cannot_add_anything_as_taxon_range(self):
         a1 = g.ExtantGenome(name="HUMAN", NCBITaxId="9601")
         a2 = g.AncestralGenome()
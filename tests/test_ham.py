@@ -6,11 +6,7 @@ import os
 
 # This helps to convert elements of list/dictionary to string in order to make easier assertEqual test.
 def _str_dict_one_value(dict):
-    for kk in dict.keys():
-        dict[str(kk)] = dict.pop(kk)
-    for k, v in dict.items():
-        dict[k] = str(v)
-    return dict
+    return {str(k): str(v) for k, v in dict.items()}
 def _str_array(array):
     array_converted = []
     for e in array:
@@ -493,6 +489,16 @@ class HAMTestQuery(unittest.TestCase):
         with self.assertRaises(KeyError):
             self.hf.get_ancestral_genome_by_name("Vertebrata")
 
+    def test_genomes_finalized(self):
+
+        for genome in self.h.get_list_extant_genomes() + self.h.get_list_ancestral_genomes():
+            self.assertIsInstance(genome.genes, tuple)
+
+        # genome created after the parsing is finalized too
+        vertebrate_tax = self.hf.get_taxon_by_name("Vertebrata")
+        vertebrates = self.hf._get_ancestral_genome_by_taxon(vertebrate_tax)
+        self.assertTupleEqual((), vertebrates.genes)
+
     def test_get_list_ancestral_genomes(self):
 
         lag = self.h.get_list_ancestral_genomes()
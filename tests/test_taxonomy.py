@@ -1,6 +1,43 @@
 import unittest
-from pyham import taxonomy, EvolutionaryConceptError
+from pyham import taxonomy, EvolutionaryConceptError, ExtantGenome, AncestralGenome
+import ete3
 import os
+import sys
+import types
+from unittest import mock
+
+try:
+    import bp
+except ImportError:
+    bp = None
+
+
+class _FakeBPTree(object):
+    """ Minimal stand-in of a bp tree (iow) exposing the api used by Taxonomy._build_tree_from_bp. """
+
+    def __init__(self, newick):
+        self.B, self._preorder, self._nodes, self._parent = [], [], {}, {}
+        stack = [(ete3.Tree(newick, format=1, quoted_node_names=False), None)]
+        while stack:
+            node, parent_idx = stack.pop()
+            idx = len(self._preorder)
+            self._preorder.append(idx)
+            self._nodes[idx] = node
+            self._parent[idx] = parent_idx
+            self.B.extend([1, 0])
+            stack.extend((child, idx) for child in reversed(node.children))
+
+    def preorderselect(self, k):
+        return self._preorder[k]
+
+    def name(self, idx):
+        return self._nodes[idx].name or None
+
+    def length(self, idx):
+        return self._nodes[idx].dist if self._parent[idx] is not None else 0.0
+
+    def parent(self, idx):
+        return self._parent[idx]
 
 
 class HAMTaxonomy(unittest.TestCase):
@@ -33,6 +70,132 @@ class HAMTaxonomy(unittest.TestCase):
         with self.assertRaises(KeyError):
             taxonomy.Taxonomy(self.newick_str_non_unique, use_internal_name=False)
 
+    def test_non_unique_internal_names(self):
+        with self.assertRaises(KeyError):
+            taxonomy.Taxonomy("((HUMAN, PANTR)Primates,(MOUSE, RATNO)Primates)Euarchontoglires;", use_internal_name=True)
+
+        # unnamed internal nodes are not duplicates
+        t = taxonomy.Taxonomy("((HUMAN, PANTR),(MOUSE, RATNO))Euarchontoglires;", use_internal_name=True)
+        observed_name = {node.name for node in t.tree.traverse() if node.is_leaf() is False}
+        self.assertSetEqual({"", "Euarchontoglires"}, observed_name)
+
+        # generated names of unary internal nodes are not duplicates
+        t = taxonomy.Taxonomy("((A,B))C;")
+        self.assertListEqual(["A/B", "A/B"], [node.name for node in t.tree.traverse() if node.is_leaf() is False])
+        t = taxonomy.Taxonomy("(((HUMAN, PANTR))Primates,(MOUSE, RATNO)Rodents)Euarchontoglires;")
+        self.assertListEqual(["HUMAN/PANTR/MOUSE/RATNO", "HUMAN/PANTR", "MOUSE/RATNO", "HUMAN/PANTR"],
+                             [node.name for node in t.tree.traverse() if node.is_leaf() is False])
+
+
+    def test_add_depth(self):
+        t = taxonomy.Taxonomy(self.newick_str, use_internal_name=True)
+        observed_depth = {node.name: node.depth for node in t.tree.traverse()}
+        self.assertDictEqual({"Euarchontoglires": 0, "Primates": 1, "Rodents": 1,
+                              "HUMAN": 2, "PANTR": 2, "MOUSE": 2, "RATNO": 2}, observed_depth)
+
+        # deep (caterpillar) tree should not hit the recursion limit
+        deep_newick = "L0"
+        for i in range(1, 2000):
+            deep_newick = "({},L{})".format(deep_newick, i)
+        t_deep = taxonomy.Taxonomy(deep_newick + ";")
+        self.assertEqual(1999, max(node.depth for node in t_deep.tree.traverse()))
+
+    def test_get_path_up(self):
+        t = taxonomy.Taxonomy(self.newick_file, use_internal_name=True, tree_format='newick')
+        human = t.tree.search_nodes(name="HUMAN")[0]
+        vertebrata = t.tree.search_nodes(name="Vertebrata")[0]
+        mammalia = t.tree.search_nodes(name="Mammalia")[0]
+        rodents = t.tree.search_nodes(name="Rodents")[0]
+
+        self.assertListEqual(["Primates", "Euarchontoglires", "Mammalia"],
+                             [n.name for n in t.get_path_up(human, vertebrata)])
+        self.assertListEqual(["Primates", "Euarchontoglires"], [n.name for n in t.get_path_up(human, mammalia)])
+        self.assertListEqual([], [n.name for n in t.get_path_up(human, human.up)])
+
+        # node not on the lineage: all ancestors up to the root are returned
+        self.assertListEqual(["Primates", "Euarchontoglires", "Mammalia", "Vertebrata"],
+                             [n.name for n in t.get_path_up(human, rodents)])
+
+    def test_is_ancestor_of_and_get_mrca(self):
+        t = taxonomy.Taxonomy(self.newick_file, use_internal_name=True, tree_format='newick')
+        n = {node.name: node for node in t.tree.traverse()}
+
+        self.assertTrue(t.is_ancestor_of(n["Mammalia"], n["HUMAN"]))
+        self.assertTrue(t.is_ancestor_of(n["HUMAN"], n["HUMAN"]))
+        self.assertFalse(t.is_ancestor_of(n["HUMAN"], n["Mammalia"]))
+        self.assertFalse(t.is_ancestor_of(n["Rodents"], n["HUMAN"]))
+
+        self.assertIs(n["Primates"], t.get_mrca([n["HUMAN"], n["PANTR"]]))
+        self.assertIs(n["Euarchontoglires"], t.get_mrca({n["HUMAN"], n["PANTR"], n["MOUSE"]}))
+        self.assertIs(n["Vertebrata"], t.get_mrca([n["XENTR"], n["HUMAN"]]))
+        self.assertIs(n["Mammalia"], t.get_mrca([n["Mammalia"], n["RATNO"]]))
+        self.assertIs(n["HUMAN"], t.get_mrca([n["HUMAN"]]))
+
+        # vectorized search once finalized, on nodes that contained a Genome
+        for node in t.tree.traverse():
+            if node.is_leaf():
+                t.add_genome_to_node(node, ExtantGenome(name=node.name))
+            elif node.name != "Primates":
+                t.add_genome_to_node(node, AncestralGenome())
+        t.finalize()
+
+        self.assertIs(n["Euarchontoglires"], t.get_mrca({n["HUMAN"], n["PANTR"], n["MOUSE"]}))
+        self.assertIs(n["Vertebrata"], t.get_mrca([n["HUMAN"], n["CANFA"], n["XENTR"]]))
+        self.assertIs(n["Mammalia"], t.get_mrca([n["RATNO"], n["Mammalia"], n["Primates"]]))
+        self.assertIs(n["Rodents"], t.get_mrca([n["Rodents"], n["Rodents"], n["Rodents"]]))
+        self.assertIs(n["Primates"], t.get_mrca([n["HUMAN"], n["PANTR"]]))
+
+        # node without Genome falls back to the traversal ids comparison
+        self.assertIs(n["Euarchontoglires"], t.get_mrca([n["Primates"], n["HUMAN"], n["RATNO"]]))
+
+    def test_finalize(self):
+        t = taxonomy.Taxonomy(self.newick_str, use_internal_name=True)
+        n = {node.name: node for node in t.tree.traverse()}
+
+        for name in ["RATNO", "HUMAN"]:
+            t.add_genome_to_node(n[name], ExtantGenome(name=name))
+        t.add_genome_to_node(n["Rodents"], AncestralGenome())
+        self.assertTupleEqual((n["HUMAN"], n["RATNO"]), t.leaves_tuple)
+
+        t.finalize()
+        self.assertTupleEqual((n["HUMAN"], n["RATNO"]), t.leaves_tuple)
+        self.assertTupleEqual((n["Rodents"],), t.internal_nodes_tuple)
+
+        # genome added after finalize
+        t.add_genome_to_node(n["Primates"], AncestralGenome())
+        self.assertTupleEqual((n["Primates"], n["Rodents"]), t.internal_nodes_tuple)
+
+    @unittest.skipIf(bp is None, "iow package (bp) not installed")
+    def test_fast_parse(self):
+        t = taxonomy.Taxonomy(self.newick_file, use_internal_name=True, tree_format='newick')
+        t_fast = taxonomy.Taxonomy(self.newick_file, use_internal_name=True, tree_format='newick', fast_parse=True)
+        self.assertEqual(t.get_newick_from_tree(t.tree), t_fast.get_newick_from_tree(t_fast.tree))
+
+    def test_build_tree_from_bp(self):
+        fake_bp = types.ModuleType('bp')
+        fake_bp.parse_newick = _FakeBPTree
+        newick = "(('HUMAN 1':0.5,PANTR:0.5)'Primates':0.1,(MOUSE:0.2,RATNO:0.2)Rodents:0.1)Euarchontoglires;"
+
+        with mock.patch.dict(sys.modules, {'bp': fake_bp}):
+            t = taxonomy.Taxonomy(newick, use_internal_name=True)
+            t_fast = taxonomy.Taxonomy(newick, use_internal_name=True, fast_parse=True)
+            t_quoted = taxonomy.Taxonomy(newick, use_internal_name=True, fast_parse=True, quoted_node_names=False)
+
+        self.assertListEqual([(n.name, n.dist) for n in t.tree.traverse("preorder")],
+                             [(n.name, n.dist) for n in t_fast.tree.traverse("preorder")])
+        self.assertListEqual([n.tid for n in t.tree.traverse("preorder")],
+                             [n.tid for n in t_fast.tree.traverse("preorder")])
+        self.assertIn("'HUMAN 1'", {n.name for n in t_quoted.tree.traverse()})
+
+        with mock.patch.dict(sys.modules, {'bp': None}):
+            with self.assertRaises(ImportError):
+                taxonomy.Taxonomy(newick, fast_parse=True)
+
+    def test_set_taxon_name(self):
+        # the name is built from the leaves, whatever the names of the intermediate nodes
+        t = taxonomy.Taxonomy(self.newick_str, use_internal_name=True)
+        t.set_taxon_name(t.tree)
+        self.assertEqual("HUMAN/PANTR/MOUSE/RATNO", t.tree.name)
 
     def test_use_internal_name(self):
 